@@ -1,8 +1,41 @@
-from typing import Dict, List, Optional, Tuple
-
-from fastapi import FastAPI
+import hashlib
+import multiprocessing
+import os
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import cached_property
+from typing import Annotated, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
+from fastapi import FastAPI, Response
 from ortools.sat.python import cp_model
-from pydantic import BaseModel
+from pydantic import BaseModel, WithJsonSchema
+from pydantic_core import to_json
+
+
+def _available_cpus() -> int:
+    """Count the CPUs this process may use.
+
+    Honours the CPU affinity mask and, when present, the cgroup v2 CPU quota
+    (container limits), neither of which os.cpu_count() reflects.
+
+    Returns:
+        Number of usable CPUs (at least 1).
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
 
 app = FastAPI()
 
@@ -12,6 +45,17 @@ PREF_PATTERN_WEIGHT = 5  # penalty if assigned pattern isn't preferred
 ADJUNCT_DAY_EXCESS_WEIGHT = 15  # penalty per day beyond adjunct max
 SOFT_LOCK_BASE_WEIGHT = 1  # base multiplier for soft lock penalties
 
+SOLVER_RANDOM_SEED = 1  # fixed seed; reproducible only with a single worker
+OPTIMIZE_NUM_WORKERS = min(16, _available_cpus())  # portfolio + LNS workers
+OPTIONS_CACHE_SIZE = 32  # recent _build_options results kept per process
+DIAGNOSTIC_POOL_MIN_SECTIONS = 40  # smaller inputs are diagnosed in-process
+
+# Parsed as a frozenset for fast membership tests, but published as a plain
+# string array so the API schema is unchanged.
+StringSet = Annotated[
+    FrozenSet[str], WithJsonSchema({"type": "array", "items": {"type": "string"}})
+]
+
 
 class Section(BaseModel):
     id: str
@@ -20,15 +64,15 @@ class Section(BaseModel):
     instructor_id: str
     expected_enrollment: int
     enrollment_cap: int
-    allowed_meeting_patterns: List[str]
-    room_requirements: List[str]
+    allowed_meeting_patterns: Tuple[str, ...]
+    room_requirements: StringSet
     crosslist_group_id: Optional[str] = None
     tags: List[str]
 
 
 class InstructorPreferences(BaseModel):
-    preferred_days: List[str]
-    preferred_patterns: List[str]
+    preferred_days: StringSet
+    preferred_patterns: StringSet
     max_teaching_days: Optional[int] = None
 
 
@@ -43,7 +87,7 @@ class Room(BaseModel):
     id: str
     building: str
     capacity: int
-    features: List[str]
+    features: StringSet
 
 
 class Timeslot(BaseModel):
@@ -57,36 +101,36 @@ class MeetingPattern(BaseModel):
     id: str
     slots_required: int
     allowed_days: List[str]
-    compatible_timeslot_sets: List[List[str]]
+    compatible_timeslot_sets: Tuple[Tuple[str, ...], ...]
 
 
 class CrossListGroup(BaseModel):
     id: str
-    member_section_ids: List[str]
+    member_section_ids: Tuple[str, ...]
     require_same_room: bool
 
 
 class NoOverlapGroup(BaseModel):
     id: str
-    member_section_ids: List[str]
+    member_section_ids: Tuple[str, ...]
     reason: str
 
 
 class BlockedTime(BaseModel):
     scope: str
-    timeslot_ids: List[str]
+    timeslot_ids: Tuple[str, ...]
     reason: str
 
 
 class LockedAssignment(BaseModel):
     section_id: str
-    fixed_timeslot_set: Optional[List[str]] = None
+    fixed_timeslot_set: Optional[StringSet] = None
     fixed_room: Optional[str] = None
 
 
 class SoftLock(BaseModel):
     section_id: str
-    preferred_timeslot_set: Optional[List[str]] = None
+    preferred_timeslot_set: Optional[StringSet] = None
     preferred_room: Optional[str] = None
     weight: float  # Higher = stronger preference (e.g., 1-100)
 
@@ -139,19 +183,6 @@ def _timeslot_days(timeslots: List[Timeslot]) -> Dict[str, str]:
     return {slot.id: slot.day for slot in timeslots}
 
 
-def _has_required_features(room: Room, required: List[str]) -> bool:
-    """Check if a room satisfies all required features.
-
-    Args:
-        room: Room being evaluated.
-        required: Required feature names.
-
-    Returns:
-        True if all required features are present, else False.
-    """
-    return all(feature in room.features for feature in required)
-
-
 def _build_crosslist_totals(sections: List[Section]) -> Dict[str, int]:
     """Compute total expected enrollment per cross-list group.
 
@@ -169,10 +200,87 @@ def _build_crosslist_totals(sections: List[Section]) -> Dict[str, int]:
     return totals
 
 
+class SchedulingContext:
+    """Lookups derived from one SchedulingInput, computed once on demand.
+
+    Args:
+        input_data: Full scheduling input.
+    """
+
+    def __init__(self, input_data: SchedulingInput):
+        self.input = input_data
+
+    @cached_property
+    def timeslot_day(self) -> Dict[str, str]:
+        return _timeslot_days(self.input.timeslots)
+
+    @cached_property
+    def unique_days(self) -> List[str]:
+        return sorted({slot.day for slot in self.input.timeslots})
+
+    @cached_property
+    def timeslot_index(self) -> Dict[str, int]:
+        return {slot.id: i for i, slot in enumerate(self.input.timeslots)}
+
+    @cached_property
+    def room_index(self) -> Dict[str, int]:
+        return {room.id: i for i, room in enumerate(self.input.rooms)}
+
+    @cached_property
+    def instructor_index(self) -> Dict[str, int]:
+        return {inst.id: i for i, inst in enumerate(self.input.instructors)}
+
+    @cached_property
+    def sections_by_id(self) -> Dict[str, Section]:
+        return {section.id: section for section in self.input.sections}
+
+    @cached_property
+    def crosslist_totals(self) -> Dict[str, int]:
+        return _build_crosslist_totals(self.input.sections)
+
+    @cached_property
+    def max_room_capacity(self) -> int:
+        return max((room.capacity for room in self.input.rooms), default=0)
+
+    @cached_property
+    def blocked_times_global(self) -> FrozenSet[str]:
+        return frozenset(
+            slot
+            for blocked in self.input.blocked_times
+            if blocked.scope == "global"
+            for slot in blocked.timeslot_ids
+        )
+
+    @cached_property
+    def frozen_timeslot_sets(self) -> Dict[Tuple[str, ...], FrozenSet[str]]:
+        # Every distinct compatible timeslot set, in first-seen order.
+        return {
+            timeslot_set: frozenset(timeslot_set)
+            for pattern in self.input.meeting_patterns
+            for timeslot_set in pattern.compatible_timeslot_sets
+        }
+
+    @cached_property
+    def timeslot_set_slots(self) -> Dict[Tuple[str, ...], Tuple[int, ...]]:
+        return _timeslot_membership(
+            list(self.frozen_timeslot_sets), self.timeslot_index
+        )
+
+    @cached_property
+    def no_overlap_groups_by_section(self) -> Dict[str, List[int]]:
+        groups_by_section: Dict[str, List[int]] = defaultdict(list)
+        for group_idx, group in enumerate(self.input.no_overlap_groups):
+            for section_id in dict.fromkeys(group.member_section_ids):
+                groups_by_section[section_id].append(group_idx)
+        return dict(groups_by_section)
+
+
 def _validate_crosslist_capacity(
     crosslists: List[CrossListGroup],
     sections: List[Section],
     rooms: List[Room],
+    crosslist_totals: Optional[Dict[str, int]] = None,
+    max_room_capacity: Optional[int] = None,
 ) -> List[ValidationError]:
     """Validate that each cross-list group can fit in at least one room.
 
@@ -180,13 +288,25 @@ def _validate_crosslist_capacity(
         crosslists: Cross-list groups.
         sections: All section definitions.
         rooms: Available rooms.
+        crosslist_totals: Precomputed _build_crosslist_totals(sections), if
+            the caller already has it.
+        max_room_capacity: Precomputed largest room capacity, if the caller
+            already has it.
 
     Returns:
         List of validation errors (empty if all groups fit).
     """
     errors: List[ValidationError] = []
-    max_room_capacity = max((room.capacity for room in rooms), default=0)
-    total_by_group = _build_crosslist_totals(sections)
+    if max_room_capacity is None:
+        max_room_capacity = max((room.capacity for room in rooms), default=0)
+    total_by_group = (
+        crosslist_totals
+        if crosslist_totals is not None
+        else _build_crosslist_totals(sections)
+    )
+    # Common case: even the largest group fits, so no group needs checking.
+    if max(total_by_group.values(), default=0) <= max_room_capacity:
+        return errors
     for group in crosslists:
         total = total_by_group.get(group.id, 0)
         if total > max_room_capacity:
@@ -202,8 +322,142 @@ def _validate_crosslist_capacity(
     return errors
 
 
+def _new_solver(
+    max_time_in_seconds: float,
+    num_workers: int,
+    stop_after_first_solution: bool = False,
+) -> cp_model.CpSolver:
+    """Create a CP-SAT solver with the shared search parameters.
+
+    Args:
+        max_time_in_seconds: Wall-clock limit for a single solve.
+        num_workers: Number of parallel search workers.
+        stop_after_first_solution: If True, stop as soon as any solution
+            is found (for feasibility checks).
+
+    Returns:
+        Configured CpSolver instance.
+    """
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = max_time_in_seconds
+    solver.parameters.random_seed = SOLVER_RANDOM_SEED
+    solver.parameters.log_search_progress = False
+    solver.parameters.cp_model_presolve = True
+    solver.parameters.stop_after_first_solution = stop_after_first_solution
+    try:
+        solver.parameters.num_workers = num_workers
+    except AttributeError:
+        # Older OR-Tools releases only expose num_search_workers.
+        solver.parameters.num_search_workers = num_workers
+    return solver
+
+
+# Bounded LRU of _build_options results keyed by _options_cache_key. Entries
+# are shared between callers and must be treated as read-only.
+_options_cache: OrderedDict = OrderedDict()
+
+
+def _options_cache_key(input_data: SchedulingInput, flags: Tuple[bool, ...]) -> bytes:
+    """Hash the input fields that option generation depends on.
+
+    Args:
+        input_data: Scheduling input.
+        flags: The ignore_* arguments passed to _build_options.
+
+    Returns:
+        16-byte digest identifying the options for this input and flags.
+    """
+    encoded = to_json(
+        (
+            input_data.sections,
+            input_data.rooms,
+            input_data.meeting_patterns,
+            input_data.blocked_times,
+            input_data.locked_assignments,
+            input_data.crosslist_groups,
+            input_data.soft_locks,
+        )
+    )
+    return hashlib.blake2b(encoded + bytes(flags), digest_size=16).digest()
+
+
+def _prune_dominated_options(
+    options_by_section: Dict[str, List[Tuple[str, Tuple[str, ...], str, int]]],
+    context: SchedulingContext,
+) -> Dict[str, List[Tuple[str, Tuple[str, ...], str, int]]]:
+    """Drop room choices that a free, less wasteful room always beats.
+
+    Option (pattern, timeslot_set, B) of a section is dominated by
+    (pattern, timeslot_set, A) of the same section when A wastes strictly
+    fewer seats and no other section has an option in A at any of those
+    timeslots: moving the section from B to A can never create a conflict
+    or raise the objective. Cross-listed sections (whose rooms are tied to
+    other members) and soft-lock preferred rooms are left untouched.
+
+    Args:
+        options_by_section: Options per section.
+        context: Scheduling input and its cached lookups.
+
+    Returns:
+        Options per section with dominated options removed.
+    """
+    input_data = context.input
+    room_index = context.room_index
+    slot_indices = context.timeslot_set_slots
+    crosslisted = {
+        section_id
+        for group in input_data.crosslist_groups
+        for section_id in group.member_section_ids
+    }
+    crosslisted.update(
+        section.id for section in input_data.sections if section.crosslist_group_id
+    )
+    preferred_room_by_section = {
+        lock.section_id: lock.preferred_room for lock in input_data.soft_locks
+    }
+
+    # (room, slot) -> the only section with an option there, or None if shared.
+    slot_owner: Dict[Tuple[int, int], Optional[str]] = {}
+    for section_id, options in options_by_section.items():
+        for _, timeslot_set, room_id, _ in options:
+            room_idx = room_index[room_id]
+            for slot_idx in slot_indices[timeslot_set]:
+                key = (room_idx, slot_idx)
+                owner = slot_owner.setdefault(key, section_id)
+                if owner is not None and owner != section_id:
+                    slot_owner[key] = None
+
+    pruned: Dict[str, List[Tuple[str, Tuple[str, ...], str, int]]] = {}
+    for section_id, options in options_by_section.items():
+        if section_id in crosslisted or len(options) < 2:
+            pruned[section_id] = options
+            continue
+        # Least waste among rooms only this section can use, per time choice.
+        best_private_waste: Dict[Tuple[str, Tuple[str, ...]], int] = {}
+        for pattern_id, timeslot_set, room_id, room_waste in options:
+            room_idx = room_index[room_id]
+            if all(
+                slot_owner[(room_idx, slot_idx)] == section_id
+                for slot_idx in slot_indices[timeslot_set]
+            ):
+                key = (pattern_id, timeslot_set)
+                if room_waste < best_private_waste.get(key, room_waste + 1):
+                    best_private_waste[key] = room_waste
+        if not best_private_waste:
+            pruned[section_id] = options
+            continue
+        preferred_room = preferred_room_by_section.get(section_id)
+        pruned[section_id] = [
+            option
+            for option in options
+            if option[2] == preferred_room
+            or option[3] <= best_private_waste.get((option[0], option[1]), option[3])
+        ]
+    return pruned
+
+
 def _build_options(
-    input_data: SchedulingInput,
+    context: SchedulingContext,
     ignore_blocked_times: bool = False,
     ignore_locks: bool = False,
     ignore_room_capacity: bool = False,
@@ -216,7 +470,7 @@ def _build_options(
     """Generate feasible assignment options per section.
 
     Args:
-        input_data: Full scheduling input.
+        context: Scheduling input and its cached lookups.
         ignore_blocked_times: If True, ignore global blocked times.
         ignore_locks: If True, ignore locked assignments.
         ignore_room_capacity: If True, ignore capacity checks.
@@ -227,66 +481,111 @@ def _build_options(
         Tuple of (options_by_section, validation_errors).
         options_by_section maps section ID to a list of options:
             (pattern_id, timeslot_set, room_id, room_waste).
+        Options dominated by a free, less wasteful room are omitted.
+        Results are cached per input, so callers must not mutate them.
     """
-    pattern_by_id = {pattern.id: pattern for pattern in input_data.meeting_patterns}
+    input_data = context.input
+    cache_key = _options_cache_key(
+        input_data,
+        (
+            ignore_blocked_times,
+            ignore_locks,
+            ignore_room_capacity,
+            ignore_room_features,
+            ignore_crosslist_capacity,
+        ),
+    )
+    cached = _options_cache.get(cache_key)
+    if cached is not None:
+        _options_cache.move_to_end(cache_key)
+        return cached
+
     locked_by_section = (
         {}
         if ignore_locks
         else {lock.section_id: lock for lock in input_data.locked_assignments}
     )
-    blocked_times_global = {
-        slot
-        for blocked in input_data.blocked_times
-        if blocked.scope == "global" and not ignore_blocked_times
-        for slot in blocked.timeslot_ids
+    blocked_times_global = (
+        frozenset() if ignore_blocked_times else context.blocked_times_global
+    )
+
+    # Equal timeslot sets from different patterns share one tuple (and one
+    # frozenset), so downstream dict lookups hit the identity fast path.
+    interned_sets: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+    frozen_by_set = context.frozen_timeslot_sets
+    # Per pattern: timeslot sets that survive the global blocked-time filter.
+    open_sets_by_pattern: Dict[str, List[Tuple[Tuple[str, ...], FrozenSet[str]]]] = {}
+    for pattern in input_data.meeting_patterns:
+        timeslot_sets = [
+            interned_sets.setdefault(ts, ts) for ts in pattern.compatible_timeslot_sets
+        ]
+        frozen_sets = [frozen_by_set[ts] for ts in timeslot_sets]
+        blocked_mask = np.fromiter(
+            (not blocked_times_global.isdisjoint(ts) for ts in frozen_sets),
+            dtype=bool,
+            count=len(frozen_sets),
+        )
+        open_sets_by_pattern[pattern.id] = [
+            (timeslot_sets[i], frozen_sets[i]) for i in np.flatnonzero(~blocked_mask)
+        ]
+
+    rooms = input_data.rooms
+    room_ids = np.array([room.id for room in rooms], dtype=object)
+    room_capacities = np.array([room.capacity for room in rooms], dtype=np.int64)
+    # Room x feature incidence, so a section's feature check is one column
+    # slice instead of a subset test per room.
+    feature_index = {
+        feature: idx
+        for idx, feature in enumerate(
+            dict.fromkeys(feature for room in rooms for feature in room.features)
+        )
     }
+    room_feature_matrix = np.zeros((len(rooms), len(feature_index)), dtype=bool)
+    for room_idx, room in enumerate(rooms):
+        for feature in room.features:
+            room_feature_matrix[room_idx, feature_index[feature]] = True
 
-    crosslist_totals = _build_crosslist_totals(input_data.sections)
+    crosslist_totals = context.crosslist_totals
     options_by_section: Dict[str, List[Tuple[str, Tuple[str, ...], str, int]]] = {}
     errors: List[ValidationError] = []
 
     for section in input_data.sections:
         lock = locked_by_section.get(section.id)
-        available_rooms = []
-        for room in input_data.rooms:
-            if not ignore_room_capacity and room.capacity < section.expected_enrollment:
-                continue
-            if not ignore_room_features and not _has_required_features(
-                room, section.room_requirements
-            ):
-                continue
-            available_rooms.append(room)
+        room_mask = np.ones(len(rooms), dtype=bool)
+        if not ignore_room_capacity:
+            room_mask &= room_capacities >= section.expected_enrollment
+        if not ignore_room_features and section.room_requirements:
+            if section.room_requirements.issubset(feature_index):
+                required_cols = [
+                    feature_index[feature] for feature in section.room_requirements
+                ]
+                room_mask &= room_feature_matrix[:, required_cols].all(axis=1)
+            else:
+                room_mask[:] = False
         if section.crosslist_group_id:
             required_capacity = crosslist_totals.get(section.crosslist_group_id, 0)
             if not ignore_crosslist_capacity and not ignore_room_capacity:
-                available_rooms = [
-                    room
-                    for room in available_rooms
-                    if room.capacity >= required_capacity
-                ]
+                room_mask &= room_capacities >= required_capacity
+        if lock and lock.fixed_room:
+            room_mask &= room_ids == lock.fixed_room
+        room_choices = [
+            (rooms[i].id, rooms[i].capacity - section.expected_enrollment)
+            for i in np.flatnonzero(room_mask)
+        ]
+        lock_fixed = lock.fixed_timeslot_set if lock else None
 
         section_options: List[Tuple[str, Tuple[str, ...], str, int]] = []
         for pattern_id in section.allowed_meeting_patterns:
-            pattern = pattern_by_id.get(pattern_id)
-            if not pattern:
+            open_sets = open_sets_by_pattern.get(pattern_id)
+            if open_sets is None:
                 continue
-            for timeslot_set in pattern.compatible_timeslot_sets:
-                if any(slot in blocked_times_global for slot in timeslot_set):
+            for timeslot_set, frozen_set in open_sets:
+                if lock_fixed and frozen_set != lock_fixed:
                     continue
-                if lock and lock.fixed_timeslot_set:
-                    if set(lock.fixed_timeslot_set) != set(timeslot_set):
-                        continue
-                for room in available_rooms:
-                    if lock and lock.fixed_room and room.id != lock.fixed_room:
-                        continue
-                    section_options.append(
-                        (
-                            pattern_id,
-                            tuple(timeslot_set),
-                            room.id,
-                            room.capacity - section.expected_enrollment,
-                        )
-                    )
+                section_options.extend(
+                    (pattern_id, timeslot_set, room_id, room_waste)
+                    for room_id, room_waste in room_choices
+                )
 
         if not section_options:
             errors.append(
@@ -297,9 +596,395 @@ def _build_options(
             )
         options_by_section[section.id] = section_options
 
+    options_by_section = _prune_dominated_options(options_by_section, context)
+    _options_cache[cache_key] = (options_by_section, errors)
+    if len(_options_cache) > OPTIONS_CACHE_SIZE:
+        _options_cache.popitem(last=False)
     return options_by_section, errors
 
 
+def _add_option_vars(
+    model: cp_model.CpModel,
+    options_by_section: Dict[str, List[Tuple[str, Tuple[str, ...], str, int]]],
+) -> Tuple[List[cp_model.IntVar], Dict[str, Tuple[int, int]]]:
+    """Create one Bool var per option and require exactly one per section.
+
+    Sections with a single option (e.g. fully locked ones) have their var
+    fixed to 1 directly, so presolve sees the assignment up front.
+
+    Args:
+        model: Model to add variables and constraints to.
+        options_by_section: Options per section from _build_options.
+
+    Returns:
+        Tuple of (option_vars, section_slices). option_vars is flat across
+        sections in options_by_section order; section_slices maps section ID
+        to the (start, end) range of its vars.
+    """
+    option_vars: List[cp_model.IntVar] = []
+    section_slices: Dict[str, Tuple[int, int]] = {}
+    for section_id, options in options_by_section.items():
+        start = len(option_vars)
+        for idx in range(len(options)):
+            option_vars.append(model.NewBoolVar(f"opt_{section_id}_{idx}"))
+        section_slices[section_id] = (start, len(option_vars))
+        if len(options) == 1:
+            model.Add(option_vars[start] == 1)
+        else:
+            model.AddExactlyOne(option_vars[start:])
+    return option_vars, section_slices
+
+
+def _timeslot_membership(
+    timeslot_sets: List[Tuple[str, ...]],
+    timeslot_index: Dict[str, int],
+) -> Dict[Tuple[str, ...], Tuple[int, ...]]:
+    """Resolve timeslot sets to indices into the timeslot list.
+
+    Membership is computed as a boolean (set x timeslot) matrix, so each
+    set maps to the distinct known timeslots it covers, in timeslot order.
+
+    Args:
+        timeslot_sets: Distinct timeslot sets to resolve.
+        timeslot_index: Mapping of timeslot ID to its index.
+
+    Returns:
+        Mapping of timeslot set to the indices of the timeslots it covers.
+    """
+    membership = np.zeros((len(timeslot_sets), len(timeslot_index)), dtype=bool)
+    for row, timeslot_set in enumerate(timeslot_sets):
+        cols = [timeslot_index[s] for s in timeslot_set if s in timeslot_index]
+        membership[row, cols] = True
+    indices_by_row: List[List[int]] = [[] for _ in timeslot_sets]
+    for row, col in zip(*np.nonzero(membership)):
+        indices_by_row[row].append(int(col))
+    return {
+        timeslot_set: tuple(indices)
+        for timeslot_set, indices in zip(timeslot_sets, indices_by_row)
+    }
+
+
+def _bucket_option_vars(
+    context: SchedulingContext,
+    options_by_section: Dict[str, List[Tuple[str, Tuple[str, ...], str, int]]],
+    option_vars: List[cp_model.IntVar],
+    section_slices: Dict[str, Tuple[int, int]],
+) -> Tuple[
+    Dict[Tuple[int, int], List[Tuple[str, cp_model.IntVar]]],
+    Dict[Tuple[int, int], List[cp_model.IntVar]],
+    Dict[Tuple[int, int], List[cp_model.IntVar]],
+]:
+    """Bucket option vars by the (room|instructor|group, timeslot) they occupy.
+
+    Keys are integer indices into the input rooms, instructors, no-overlap
+    groups and timeslots. Sections whose instructor is not defined get no
+    instructor buckets.
+
+    Args:
+        context: Scheduling input and its cached lookups.
+        options_by_section: Options per section from _build_options.
+        option_vars: Bool var per option, flat across sections.
+        section_slices: (start, end) of each section's vars in option_vars.
+
+    Returns:
+        Tuple of (room_slot_vars, instructor_slot_vars, group_slot_vars).
+        Room buckets hold (section_id, var) pairs; the others hold vars.
+    """
+    sections_by_id = context.sections_by_id
+    room_index = context.room_index
+    instructor_index = context.instructor_index
+    no_overlap_groups_by_section = context.no_overlap_groups_by_section
+    slot_indices = context.timeslot_set_slots
+
+    room_slot_vars: Dict[Tuple[int, int], List[Tuple[str, cp_model.IntVar]]] = (
+        defaultdict(list)
+    )
+    instructor_slot_vars: Dict[Tuple[int, int], List[cp_model.IntVar]] = (
+        defaultdict(list)
+    )
+    group_slot_vars: Dict[Tuple[int, int], List[cp_model.IntVar]] = defaultdict(list)
+    for section_id, options in options_by_section.items():
+        instructor_idx = instructor_index.get(sections_by_id[section_id].instructor_id)
+        group_idxs = no_overlap_groups_by_section.get(section_id, ())
+        start, end = section_slices[section_id]
+        for var, (_, timeslot_set, room_id, _) in zip(option_vars[start:end], options):
+            room_idx = room_index[room_id]
+            for slot_idx in slot_indices[timeslot_set]:
+                room_slot_vars[(room_idx, slot_idx)].append((section_id, var))
+                if instructor_idx is not None:
+                    instructor_slot_vars[(instructor_idx, slot_idx)].append(var)
+                for group_idx in group_idxs:
+                    group_slot_vars[(group_idx, slot_idx)].append(var)
+    return room_slot_vars, instructor_slot_vars, group_slot_vars
+
+
+def _option_penalty_columns(
+    context: SchedulingContext,
+    options_by_section: Dict[str, List[Tuple[str, Tuple[str, ...], str, int]]],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Compute per-option penalty columns, aligned with option_vars.
+
+    Options are flattened into integer columns (instructor, timeslot set,
+    pattern, room waste), and preference penalties are looked up in Bool
+    (instructor x day) and (instructor x pattern) tables in one vectorized
+    pass. Sections whose instructor is not defined have no preferences.
+
+    Args:
+        context: Scheduling input and its cached lookups.
+        options_by_section: Options per section from _build_options.
+
+    Returns:
+        Tuple of (room_waste_penalties, day_penalties, pattern_penalties).
+    """
+    input_data = context.input
+    sections_by_id = context.sections_by_id
+    timeslot_day = context.timeslot_day
+    instructor_index = context.instructor_index
+    day_index = {day: i for i, day in enumerate(context.unique_days)}
+    pattern_index = {
+        pattern.id: i for i, pattern in enumerate(input_data.meeting_patterns)
+    }
+    timeslot_sets = list(context.frozen_timeslot_sets)
+    set_index = {timeslot_set: i for i, timeslot_set in enumerate(timeslot_sets)}
+
+    set_days = np.zeros((len(timeslot_sets), len(day_index)), dtype=bool)
+    for row, timeslot_set in enumerate(timeslot_sets):
+        # Sets of patterns no section uses may name unknown timeslots.
+        set_days[
+            row,
+            [
+                day_index[timeslot_day[slot]]
+                for slot in timeslot_set
+                if slot in timeslot_day
+            ],
+        ] = True
+    # The extra last row stands for undefined instructors.
+    no_instructor = len(input_data.instructors)
+    pref_days = np.zeros((no_instructor + 1, len(day_index)), dtype=bool)
+    pref_patterns = np.zeros((no_instructor + 1, len(pattern_index)), dtype=bool)
+    for row, instructor in enumerate(input_data.instructors):
+        preferences = instructor.preferences
+        pref_days[
+            row,
+            [day_index[day] for day in preferences.preferred_days if day in day_index],
+        ] = True
+        pref_patterns[
+            row,
+            [
+                pattern_index[pattern_id]
+                for pattern_id in preferences.preferred_patterns
+                if pattern_id in pattern_index
+            ],
+        ] = True
+
+    option_instructors: List[int] = []
+    option_sets: List[int] = []
+    option_patterns: List[int] = []
+    option_wastes: List[int] = []
+    for section_id, options in options_by_section.items():
+        instructor_row = instructor_index.get(
+            sections_by_id[section_id].instructor_id, no_instructor
+        )
+        option_instructors.extend([instructor_row] * len(options))
+        for pattern_id, timeslot_set, _, room_waste in options:
+            option_sets.append(set_index[timeslot_set])
+            option_patterns.append(pattern_index[pattern_id])
+            option_wastes.append(room_waste)
+    instructor_col = np.array(option_instructors, dtype=np.intp)
+    set_col = np.array(option_sets, dtype=np.intp)
+    pattern_col = np.array(option_patterns, dtype=np.intp)
+
+    day_match = (set_days[set_col] & pref_days[instructor_col]).any(axis=1)
+    day_penalties = np.where(day_match, 0, PREF_DAY_WEIGHT).astype(np.int64)
+    pattern_penalties = np.where(
+        pref_patterns[instructor_col, pattern_col], 0, PREF_PATTERN_WEIGHT
+    ).astype(np.int64)
+    room_waste_penalties = np.array(option_wastes, dtype=np.int64) * ROOM_WASTE_WEIGHT
+    return room_waste_penalties, day_penalties, pattern_penalties
+
+
+def _greedy_assignment(
+    context: SchedulingContext,
+    options_by_section: Dict[str, List[Tuple[str, Tuple[str, ...], str, int]]],
+    penalties_by_section: Dict[str, List[int]],
+) -> Dict[str, int]:
+    """Pick a cheap conflict-free option per section, most constrained first.
+
+    Sections are visited by (option count ascending, enrollment descending)
+    and take their lowest-penalty option whose room, instructor and
+    no-overlap groups are still free at every timeslot. Used only as a
+    solver hint, so cross-list rules are not enforced.
+
+    Args:
+        context: Scheduling input and its cached lookups.
+        options_by_section: Options per section from _build_options.
+        penalties_by_section: Per-option penalty, aligned with the options.
+
+    Returns:
+        Mapping of section ID to chosen option index (sections that could
+        not be placed are omitted).
+    """
+    sections_by_id = context.sections_by_id
+    order = sorted(
+        options_by_section,
+        key=lambda sid: (
+            len(options_by_section[sid]),
+            -sections_by_id[sid].expected_enrollment,
+        ),
+    )
+    room_index = context.room_index
+    instructor_index = context.instructor_index
+    slot_indices = context.timeslot_set_slots
+    no_overlap_groups_by_section = context.no_overlap_groups_by_section
+    used_room_slots: set = set()
+    used_instructor_slots: set = set()
+    used_group_slots: set = set()
+    choice: Dict[str, int] = {}
+    for section_id in order:
+        # Like the model, only defined instructors are checked for overlaps.
+        instructor_idx = instructor_index.get(sections_by_id[section_id].instructor_id)
+        group_idxs = no_overlap_groups_by_section.get(section_id, ())
+        options = options_by_section[section_id]
+        penalties = penalties_by_section[section_id]
+        for idx in sorted(range(len(options)), key=penalties.__getitem__):
+            _, timeslot_set, room_id, _ = options[idx]
+            slots = slot_indices[timeslot_set]
+            room_idx = room_index[room_id]
+            room_slots = [(room_idx, slot_idx) for slot_idx in slots]
+            instructor_slots = (
+                [(instructor_idx, slot_idx) for slot_idx in slots]
+                if instructor_idx is not None
+                else []
+            )
+            group_slots = [
+                (group_idx, slot_idx) for group_idx in group_idxs for slot_idx in slots
+            ]
+            if not (
+                used_room_slots.isdisjoint(room_slots)
+                and used_instructor_slots.isdisjoint(instructor_slots)
+                and used_group_slots.isdisjoint(group_slots)
+            ):
+                continue
+            used_room_slots.update(room_slots)
+            used_instructor_slots.update(instructor_slots)
+            used_group_slots.update(group_slots)
+            choice[section_id] = idx
+            break
+    return choice
+
+
+def _add_crosslist_constraints(
+    model: cp_model.CpModel,
+    crosslists: List[CrossListGroup],
+    options_by_section: Dict[str, List[Tuple[str, Tuple[str, ...], str, int]]],
+    option_vars: List[cp_model.IntVar],
+    section_slices: Dict[str, Tuple[int, int]],
+) -> None:
+    """Require cross-listed sections to share times and (optionally) room.
+
+    Each group gets one Bool "class" var per (timeslot_set[, room]) key that
+    every member can take. A member's option vars for a key sum to that
+    key's class var and exactly one class var holds per group, so all
+    members land on the same key. Options whose key some member lacks are
+    fixed to 0.
+
+    Args:
+        model: Model to add constraints to.
+        crosslists: Cross-list groups.
+        options_by_section: Options per section from _build_options.
+        option_vars: Bool var per option, flat across sections.
+        section_slices: (start, end) of each section's vars in option_vars.
+    """
+    for group_idx, group in enumerate(crosslists):
+        members = [
+            section_id
+            for section_id in dict.fromkeys(group.member_section_ids)
+            if options_by_section.get(section_id)
+        ]
+        if len(members) < 2:
+            continue
+        vars_by_key_by_member: List[Dict[Tuple, List[cp_model.IntVar]]] = []
+        for section_id in members:
+            vars_by_key: Dict[Tuple, List[cp_model.IntVar]] = defaultdict(list)
+            start, end = section_slices[section_id]
+            for var, (_, timeslot_set, room_id, _) in zip(
+                option_vars[start:end], options_by_section[section_id]
+            ):
+                key = (timeslot_set, room_id if group.require_same_room else None)
+                vars_by_key[key].append(var)
+            vars_by_key_by_member.append(vars_by_key)
+
+        shared_keys = [
+            key
+            for key in vars_by_key_by_member[0]
+            if all(key in vars_by_key for vars_by_key in vars_by_key_by_member[1:])
+        ]
+        class_vars = []
+        for key_idx, key in enumerate(shared_keys):
+            class_var = model.NewBoolVar(f"crosslist_{group_idx}_{key_idx}")
+            for vars_by_key in vars_by_key_by_member:
+                model.Add(cp_model.LinearExpr.Sum(vars_by_key[key]) == class_var)
+            class_vars.append(class_var)
+        model.AddExactlyOne(class_vars)
+
+        shared = set(shared_keys)
+        for vars_by_key in vars_by_key_by_member:
+            for key, vars_for_key in vars_by_key.items():
+                if key not in shared:
+                    for var in vars_for_key:
+                        model.Add(var == 0)
+
+
+def _add_room_symmetry_breaking(
+    model: cp_model.CpModel,
+    context: SchedulingContext,
+    options_by_section: Dict[str, List[Tuple[str, Tuple[str, ...], str, int]]],
+    option_vars: List[cp_model.IntVar],
+    section_slices: Dict[str, Tuple[int, int]],
+) -> None:
+    """Order interchangeable rooms by how many sections they host.
+
+    Rooms with the same capacity and features that no lock or soft lock
+    names are interchangeable: swapping all of their assignments keeps
+    every constraint and the objective unchanged. Requiring non-increasing
+    usage along each class prunes those symmetric branches.
+
+    Args:
+        model: Model to add constraints to.
+        context: Scheduling input and its cached lookups.
+        options_by_section: Options per section from _build_options.
+        option_vars: Bool var per option, flat across sections.
+        section_slices: (start, end) of each section's vars in option_vars.
+    """
+    input_data = context.input
+    pinned_rooms = {
+        lock.fixed_room for lock in input_data.locked_assignments if lock.fixed_room
+    } | {lock.preferred_room for lock in input_data.soft_locks if lock.preferred_room}
+    rooms_by_class: Dict[Tuple[int, FrozenSet[str]], List[str]] = defaultdict(list)
+    for room in input_data.rooms:
+        if room.id not in pinned_rooms:
+            rooms_by_class[(room.capacity, room.features)].append(room.id)
+    symmetric_classes = [
+        list(dict.fromkeys(room_ids))
+        for room_ids in rooms_by_class.values()
+        if len(set(room_ids)) >= 2
+    ]
+    if not symmetric_classes:
+        return
+
+    vars_by_room: Dict[str, List[cp_model.IntVar]] = defaultdict(list)
+    for section_id, options in options_by_section.items():
+        start, end = section_slices[section_id]
+        for var, (_, _, room_id, _) in zip(option_vars[start:end], options):
+            vars_by_room[room_id].append(var)
+    for room_ids in symmetric_classes:
+        for room_a, room_b in zip(room_ids, room_ids[1:]):
+            model.Add(
+                cp_model.LinearExpr.Sum(vars_by_room[room_a])
+                >= cp_model.LinearExpr.Sum(vars_by_room[room_b])
+            )
+
+
 def _strip_section(input_data: SchedulingInput, section_id: str) -> SchedulingInput:
     """Return input data with one section removed and groups adjusted.
 
@@ -309,27 +994,31 @@ def _strip_section(input_data: SchedulingInput, section_id: str) -> SchedulingIn
 
     Returns:
         A new SchedulingInput with the section removed and any groups updated.
+        Unchanged models are shared with input_data, and nothing is
+        re-validated.
     """
     remaining_sections = [s for s in input_data.sections if s.id != section_id]
     remaining_crosslists = []
     for group in input_data.crosslist_groups:
-        members = [sid for sid in group.member_section_ids if sid != section_id]
-        if len(members) >= 2:
+        members = tuple(sid for sid in group.member_section_ids if sid != section_id)
+        if len(members) < 2:
+            continue
+        if len(members) == len(group.member_section_ids):
+            remaining_crosslists.append(group)
+        else:
             remaining_crosslists.append(
-                CrossListGroup(
-                    id=group.id,
-                    member_section_ids=members,
-                    require_same_room=group.require_same_room,
-                )
+                group.model_copy(update={"member_section_ids": members})
             )
     remaining_no_overlap = []
     for group in input_data.no_overlap_groups:
-        members = [sid for sid in group.member_section_ids if sid != section_id]
-        if len(members) >= 2:
+        members = tuple(sid for sid in group.member_section_ids if sid != section_id)
+        if len(members) < 2:
+            continue
+        if len(members) == len(group.member_section_ids):
+            remaining_no_overlap.append(group)
+        else:
             remaining_no_overlap.append(
-                NoOverlapGroup(
-                    id=group.id, member_section_ids=members, reason=group.reason
-                )
+                group.model_copy(update={"member_section_ids": members})
             )
     remaining_locks = [
         lock for lock in input_data.locked_assignments if lock.section_id != section_id
@@ -337,7 +1026,7 @@ def _strip_section(input_data: SchedulingInput, section_id: str) -> SchedulingIn
     remaining_soft_locks = [
         lock for lock in input_data.soft_locks if lock.section_id != section_id
     ]
-    return SchedulingInput(
+    return SchedulingInput.model_construct(
         sections=remaining_sections,
         instructors=input_data.instructors,
         rooms=input_data.rooms,
@@ -352,134 +1041,208 @@ def _strip_section(input_data: SchedulingInput, section_id: str) -> SchedulingIn
 
 
 def _check_feasible(
-    input_data: SchedulingInput,
+    context: SchedulingContext,
+    num_workers: int,
     relax: Optional[set] = None,
+    options_by_section: Optional[
+        Dict[str, List[Tuple[str, Tuple[str, ...], str, int]]]
+    ] = None,
 ) -> bool:
     """Check feasibility under optional constraint relaxations.
 
     Args:
-        input_data: Full scheduling input.
+        context: Scheduling input and its cached lookups.
+        num_workers: Number of CP-SAT search workers to use.
         relax: Set of constraint keys to relax (ignore).
+        options_by_section: Error-free _build_options result to reuse, valid
+            only when relax does not affect option generation.
 
     Returns:
         True if a feasible assignment exists, else False.
     """
     relax = relax or set()
+    input_data = context.input
     errors: List[ValidationError] = []
     if "crosslist_capacity" not in relax:
         errors.extend(
             _validate_crosslist_capacity(
-                input_data.crosslist_groups, input_data.sections, input_data.rooms
+                input_data.crosslist_groups,
+                input_data.sections,
+                input_data.rooms,
+                context.crosslist_totals,
+                context.max_room_capacity,
             )
         )
     if errors:
         return False
 
-    options_by_section, option_errors = _build_options(
-        input_data,
-        ignore_blocked_times="blocked_times" in relax,
-        ignore_locks="locks" in relax,
-        ignore_room_capacity="room_capacity" in relax,
-        ignore_room_features="room_features" in relax,
-        ignore_crosslist_capacity="crosslist_capacity" in relax,
-    )
-    if option_errors:
-        return False
+    if options_by_section is None:
+        options_by_section, option_errors = _build_options(
+            context,
+            ignore_blocked_times="blocked_times" in relax,
+            ignore_locks="locks" in relax,
+            ignore_room_capacity="room_capacity" in relax,
+            ignore_room_features="room_features" in relax,
+            ignore_crosslist_capacity="crosslist_capacity" in relax,
+        )
+        if option_errors:
+            return False
 
     model = cp_model.CpModel()
-    sections_by_id = {section.id: section for section in input_data.sections}
 
-    option_vars: Dict[Tuple[str, int], cp_model.IntVar] = {}
-    option_data: Dict[Tuple[str, int], Tuple[str, Tuple[str, ...], str, int]] = {}
-
-    for section_id, options in options_by_section.items():
-        section_vars = []
-        for idx, option in enumerate(options):
-            var = model.NewBoolVar(f"opt_{section_id}_{idx}")
-            option_vars[(section_id, idx)] = var
-            option_data[(section_id, idx)] = option
-            section_vars.append(var)
-        model.Add(sum(section_vars) == 1)
+    option_vars, section_slices = _add_option_vars(model, options_by_section)
 
+    room_slot_vars, instructor_slot_vars, group_slot_vars = _bucket_option_vars(
+        context, options_by_section, option_vars, section_slices
+    )
+    # Single-var buckets are trivially satisfied and only add model noise.
     if "room_conflicts" not in relax:
-        for room in input_data.rooms:
-            for timeslot in input_data.timeslots:
-                vars_for_slot = []
-                for (section_id, idx), var in option_vars.items():
-                    _, timeslot_set, room_id, _ = option_data[(section_id, idx)]
-                    if room_id == room.id and timeslot.id in timeslot_set:
-                        vars_for_slot.append(var)
-                if vars_for_slot:
-                    model.Add(sum(vars_for_slot) <= 1)
+        for entries in room_slot_vars.values():
+            if len(entries) > 1:
+                model.AddAtMostOne([var for _, var in entries])
 
     if "instructor_conflicts" not in relax:
-        for instructor in input_data.instructors:
-            for timeslot in input_data.timeslots:
-                vars_for_slot = []
-                for (section_id, idx), var in option_vars.items():
-                    section = sections_by_id[section_id]
-                    if section.instructor_id != instructor.id:
-                        continue
-                    _, timeslot_set, _, _ = option_data[(section_id, idx)]
-                    if timeslot.id in timeslot_set:
-                        vars_for_slot.append(var)
-                if vars_for_slot:
-                    model.Add(sum(vars_for_slot) <= 1)
+        for vars_for_slot in instructor_slot_vars.values():
+            if len(vars_for_slot) > 1:
+                model.AddAtMostOne(vars_for_slot)
 
     if "no_overlap_groups" not in relax:
-        for group in input_data.no_overlap_groups:
-            for timeslot in input_data.timeslots:
-                vars_for_slot = []
-                for section_id in group.member_section_ids:
-                    for idx, _ in enumerate(options_by_section.get(section_id, [])):
-                        var = option_vars[(section_id, idx)]
-                        _, timeslot_set, _, _ = option_data[(section_id, idx)]
-                        if timeslot.id in timeslot_set:
-                            vars_for_slot.append(var)
-                if vars_for_slot:
-                    model.Add(sum(vars_for_slot) <= 1)
+        for vars_for_slot in group_slot_vars.values():
+            if len(vars_for_slot) > 1:
+                model.AddAtMostOne(vars_for_slot)
 
     if "crosslist_time_room" not in relax:
-        for group in input_data.crosslist_groups:
-            members = group.member_section_ids
-            for i, section_a in enumerate(members):
-                for section_b in members[i + 1 :]:
-                    options_a = options_by_section.get(section_a, [])
-                    options_b = options_by_section.get(section_b, [])
-                    for idx_a, option_a in enumerate(options_a):
-                        _, timeslot_a, room_a, _ = option_a
-                        for idx_b, option_b in enumerate(options_b):
-                            _, timeslot_b, room_b, _ = option_b
-                            if timeslot_a != timeslot_b:
-                                model.Add(
-                                    option_vars[(section_a, idx_a)]
-                                    + option_vars[(section_b, idx_b)]
-                                    <= 1
-                                )
-                            elif group.require_same_room and room_a != room_b:
-                                model.Add(
-                                    option_vars[(section_a, idx_a)]
-                                    + option_vars[(section_b, idx_b)]
-                                    <= 1
-                                )
+        _add_crosslist_constraints(
+            model,
+            input_data.crosslist_groups,
+            options_by_section,
+            option_vars,
+            section_slices,
+        )
 
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 2.0
+    solver = _new_solver(2.0, num_workers, stop_after_first_solution=True)
+    # Only a yes/no answer is needed: one solution suffices and expensive
+    # probing in presolve buys nothing without an objective.
+    solver.parameters.enumerate_all_solutions = False
+    solver.parameters.cp_model_probing_level = 0
     status = solver.Solve(model)
     return status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
 
 
-def _diagnose_infeasibility(input_data: SchedulingInput) -> Dict[str, List[str]]:
+# Diagnostics pool, created on first use and kept for the life of the process.
+_diagnostic_pool: Optional[ProcessPoolExecutor] = None
+# Per-worker copy of the input last diagnosed, keyed by a hash of its JSON.
+_diagnostic_input_key: Optional[bytes] = None
+_diagnostic_input: Optional[SchedulingInput] = None
+
+
+def _get_diagnostic_pool() -> ProcessPoolExecutor:
+    """Return the diagnostics pool, creating it on first use.
+
+    Workers are started with forkserver (spawn where unavailable), since
+    forking the multi-threaded server process can deadlock.
+
+    Returns:
+        Process pool shared by every diagnostics request.
+    """
+    global _diagnostic_pool
+    if _diagnostic_pool is None:
+        start_method = (
+            "forkserver"
+            if "forkserver" in multiprocessing.get_all_start_methods()
+            else "spawn"
+        )
+        _diagnostic_pool = ProcessPoolExecutor(
+            max_workers=_available_cpus(),
+            mp_context=multiprocessing.get_context(start_method),
+        )
+    return _diagnostic_pool
+
+
+def _run_diagnostic_check(
+    input_data: SchedulingInput,
+    relax_key: Optional[str],
+    removed_section_id: Optional[str],
+    options_by_section: Optional[
+        Dict[str, List[Tuple[str, Tuple[str, ...], str, int]]]
+    ] = None,
+) -> bool:
+    """Run one diagnostic feasibility check.
+
+    Args:
+        input_data: Validated scheduling input.
+        relax_key: Constraint key to relax, if any.
+        removed_section_id: Section ID to strip before checking, if any.
+        options_by_section: Precomputed options to reuse, if still valid.
+
+    Returns:
+        True if the adjusted input is feasible, else False.
+    """
+    if removed_section_id is not None:
+        input_data = _strip_section(input_data, removed_section_id)
+    relax = {relax_key} if relax_key else None
+    # Checks run side by side (or are too small to benefit); keep each
+    # solve single-threaded.
+    return _check_feasible(
+        SchedulingContext(input_data),
+        num_workers=1,
+        relax=relax,
+        options_by_section=options_by_section,
+    )
+
+
+def _check_feasible_job(
+    input_key: bytes,
+    input_json: bytes,
+    relax_key: Optional[str],
+    removed_section_id: Optional[str],
+    options_by_section: Optional[
+        Dict[str, List[Tuple[str, Tuple[str, ...], str, int]]]
+    ] = None,
+) -> bool:
+    """Run one diagnostic feasibility check in a worker process.
+
+    The input travels as JSON and is parsed once per worker and input, then
+    reused for the remaining jobs of the same request.
+
+    Args:
+        input_key: Hash of input_json.
+        input_json: Serialized scheduling input.
+        relax_key: Constraint key to relax, if any.
+        removed_section_id: Section ID to strip before checking, if any.
+        options_by_section: Precomputed options to reuse, if still valid.
+
+    Returns:
+        True if the adjusted input is feasible, else False.
+    """
+    global _diagnostic_input_key, _diagnostic_input
+    if _diagnostic_input_key != input_key:
+        _diagnostic_input = SchedulingInput.model_validate_json(input_json)
+        _diagnostic_input_key = input_key
+    return _run_diagnostic_check(
+        _diagnostic_input, relax_key, removed_section_id, options_by_section
+    )
+
+
+def _diagnose_infeasibility(
+    context: SchedulingContext,
+    options_by_section: Optional[
+        Dict[str, List[Tuple[str, Tuple[str, ...], str, int]]]
+    ] = None,
+) -> Dict[str, List[str]]:
     """Suggest single-step relaxations/removals that restore feasibility.
 
     Args:
-        input_data: Full scheduling input.
+        context: Scheduling input and its cached lookups.
+        options_by_section: Unrelaxed _build_options result, if the caller
+            already has it.
 
     Returns:
         Diagnostics with two lists:
             - feasible_if_relax: constraint families to relax.
             - feasible_if_remove_section: section IDs to remove.
     """
+    global _diagnostic_pool
     relax_candidates = [
         ("blocked_times", "Blocked time constraints"),
         ("locks", "Locked assignments"),
@@ -491,16 +1254,72 @@ def _diagnose_infeasibility(input_data: SchedulingInput) -> Dict[str, List[str]]
         ("no_overlap_groups", "No-overlap groups"),
         ("crosslist_time_room", "Cross-list time/room equality"),
     ]
-    feasible_if_relax: List[str] = []
-    for relax_key, label in relax_candidates:
-        if _check_feasible(input_data, {relax_key}):
-            feasible_if_relax.append(label)
-
-    feasible_if_remove_section: List[str] = []
-    for section in input_data.sections:
-        stripped = _strip_section(input_data, section.id)
-        if _check_feasible(stripped):
-            feasible_if_remove_section.append(section.id)
+    # Relaxing these only drops constraints; the options stay the same.
+    option_independent_keys = {
+        "room_conflicts",
+        "instructor_conflicts",
+        "no_overlap_groups",
+        "crosslist_time_room",
+    }
+    input_data = context.input
+    if options_by_section is None:
+        # Sections without options keep an empty exactly-one, so reusing
+        # these for the keys below still reports infeasible, as rebuilding
+        # them would.
+        options_by_section, _ = _build_options(context)
+
+    checks: List[
+        Tuple[
+            Optional[str],
+            Optional[str],
+            Optional[Dict[str, List[Tuple[str, Tuple[str, ...], str, int]]]],
+        ]
+    ] = [
+        (
+            relax_key,
+            None,
+            options_by_section if relax_key in option_independent_keys else None,
+        )
+        for relax_key, _ in relax_candidates
+    ]
+    checks.extend((None, section.id, None) for section in input_data.sections)
+
+    results: Optional[List[bool]] = None
+    # Every check is independent, so fan them out across processes, unless
+    # the checks are too few or too small to repay the round trips.
+    if (
+        len(input_data.sections) >= DIAGNOSTIC_POOL_MIN_SECTIONS
+        and _available_cpus() > 1
+    ):
+        input_json = to_json(input_data)
+        input_key = hashlib.blake2b(input_json, digest_size=16).digest()
+        executor = _get_diagnostic_pool()
+        try:
+            futures = [
+                executor.submit(_check_feasible_job, input_key, input_json, *check)
+                for check in checks
+            ]
+            results = [future.result() for future in futures]
+        except BrokenProcessPool:
+            # A worker died; drop the pool so the next request starts a fresh
+            # one, and finish this request in-process.
+            executor.shutdown(wait=False, cancel_futures=True)
+            _diagnostic_pool = None
+    if results is None:
+        results = [_run_diagnostic_check(input_data, *check) for check in checks]
+
+    relax_results = results[: len(relax_candidates)]
+    remove_results = results[len(relax_candidates) :]
+    feasible_if_relax = [
+        label
+        for (_, label), feasible in zip(relax_candidates, relax_results)
+        if feasible
+    ]
+    feasible_if_remove_section = [
+        section.id
+        for section, feasible in zip(input_data.sections, remove_results)
+        if feasible
+    ]
 
     return {
         "feasible_if_relax": feasible_if_relax,
@@ -517,22 +1336,26 @@ def _solve_schedule(input_data: SchedulingInput):
     Returns:
         Dict payload with status, solution or errors/diagnostics.
     """
+    context = SchedulingContext(input_data)
     errors: List[ValidationError] = []
     errors.extend(
         _validate_crosslist_capacity(
-            input_data.crosslist_groups, input_data.sections, input_data.rooms
+            input_data.crosslist_groups,
+            input_data.sections,
+            input_data.rooms,
+            context.crosslist_totals,
+            context.max_room_capacity,
         )
     )
-    options_by_section, option_errors = _build_options(input_data)
+    options_by_section, option_errors = _build_options(context)
     errors.extend(option_errors)
     if errors:
         return {"status": "error", "errors": [err.model_dump() for err in errors]}
 
     # Build optimization model
     model = cp_model.CpModel()
-    timeslot_day = _timeslot_days(input_data.timeslots)
-    instructors_by_id = {inst.id: inst for inst in input_data.instructors}
-    sections_by_id = {section.id: section for section in input_data.sections}
+    timeslot_day = context.timeslot_day
+    sections_by_id = context.sections_by_id
     crosslist_roomshare = {
         group.id
         for group in input_data.crosslist_groups
@@ -545,166 +1368,170 @@ def _solve_schedule(input_data: SchedulingInput):
         else:
             section_to_roomshare_group[section.id] = f"sec:{section.id}"
 
-    option_vars: Dict[Tuple[str, int], cp_model.IntVar] = {}
-    option_data: Dict[Tuple[str, int], Tuple[str, Tuple[str, ...], str, int]] = {}
-
     # One option must be selected per section.
-    for section_id, options in options_by_section.items():
-        section_vars = []
-        for idx, option in enumerate(options):
-            var = model.NewBoolVar(f"opt_{section_id}_{idx}")
-            option_vars[(section_id, idx)] = var
-            option_data[(section_id, idx)] = option
-            section_vars.append(var)
-        model.Add(sum(section_vars) == 1)
+    option_vars, section_slices = _add_option_vars(model, options_by_section)
+
+    room_slot_vars, instructor_slot_vars, group_slot_vars = _bucket_option_vars(
+        context, options_by_section, option_vars, section_slices
+    )
 
     # Room usage: prevent overlaps across different roomshare groups.
-    for room in input_data.rooms:
-        for timeslot in input_data.timeslots:
-            vars_by_group: Dict[str, List[cp_model.IntVar]] = {}
-            for (section_id, idx), var in option_vars.items():
-                _, timeslot_set, room_id, _ = option_data[(section_id, idx)]
-                if room_id == room.id and timeslot.id in timeslot_set:
-                    group_key = section_to_roomshare_group[section_id]
-                    vars_by_group.setdefault(group_key, []).append(var)
-            if vars_by_group:
-                group_used_vars = []
-                for group_key, vars_for_group in vars_by_group.items():
-                    group_used = model.NewBoolVar(f"room_use_{room.id}_{timeslot.id}_{group_key}")
-                    for var in vars_for_group:
-                        model.Add(group_used >= var)
-                    group_used_vars.append(group_used)
-                model.Add(sum(group_used_vars) <= 1)
+    for (room_idx, slot_idx), entries in room_slot_vars.items():
+        room_id = input_data.rooms[room_idx].id
+        slot_id = input_data.timeslots[slot_idx].id
+        vars_by_group: Dict[str, List[cp_model.IntVar]] = {}
+        for section_id, var in entries:
+            group_key = section_to_roomshare_group[section_id]
+            vars_by_group.setdefault(group_key, []).append(var)
+        if len(vars_by_group) < 2:
+            continue
+        group_used_vars = []
+        for group_key, vars_for_group in vars_by_group.items():
+            if len(vars_for_group) == 1:
+                group_used_vars.append(vars_for_group[0])
+                continue
+            group_used = model.NewBoolVar(f"room_use_{room_id}_{slot_id}_{group_key}")
+            model.AddMaxEquality(group_used, vars_for_group)
+            group_used_vars.append(group_used)
+        model.AddAtMostOne(group_used_vars)
 
     # Instructor cannot teach overlapping times.
-    for instructor in input_data.instructors:
-        for timeslot in input_data.timeslots:
-            vars_for_slot = []
-            for (section_id, idx), var in option_vars.items():
-                section = sections_by_id[section_id]
-                if section.instructor_id != instructor.id:
-                    continue
-                _, timeslot_set, _, _ = option_data[(section_id, idx)]
-                if timeslot.id in timeslot_set:
-                    vars_for_slot.append(var)
-            if vars_for_slot:
-                model.Add(sum(vars_for_slot) <= 1)
+    for vars_for_slot in instructor_slot_vars.values():
+        if len(vars_for_slot) > 1:
+            model.AddAtMostOne(vars_for_slot)
 
     # No-overlap groups cannot overlap in time.
-    for group in input_data.no_overlap_groups:
-        for timeslot in input_data.timeslots:
-            vars_for_slot = []
-            for section_id in group.member_section_ids:
-                for idx, _ in enumerate(options_by_section.get(section_id, [])):
-                    var = option_vars[(section_id, idx)]
-                    _, timeslot_set, _, _ = option_data[(section_id, idx)]
-                    if timeslot.id in timeslot_set:
-                        vars_for_slot.append(var)
-            if vars_for_slot:
-                model.Add(sum(vars_for_slot) <= 1)
+    for vars_for_slot in group_slot_vars.values():
+        if len(vars_for_slot) > 1:
+            model.AddAtMostOne(vars_for_slot)
 
     # Cross-listed sections share times and (optionally) room.
-    for group in input_data.crosslist_groups:
-        members = group.member_section_ids
-        for i, section_a in enumerate(members):
-            for section_b in members[i + 1 :]:
-                options_a = options_by_section.get(section_a, [])
-                options_b = options_by_section.get(section_b, [])
-                for idx_a, option_a in enumerate(options_a):
-                    _, timeslot_a, room_a, _ = option_a
-                    for idx_b, option_b in enumerate(options_b):
-                        _, timeslot_b, room_b, _ = option_b
-                        if timeslot_a != timeslot_b:
-                            model.Add(
-                                option_vars[(section_a, idx_a)]
-                                + option_vars[(section_b, idx_b)]
-                                <= 1
-                            )
-                        elif group.require_same_room and room_a != room_b:
-                            model.Add(
-                                option_vars[(section_a, idx_a)]
-                                + option_vars[(section_b, idx_b)]
-                                <= 1
-                            )
-
-    # Soft constraint terms for the objective.
-    penalty_terms = []
-    unique_days = sorted({slot.day for slot in input_data.timeslots})
-
-    instructor_day_vars: Dict[Tuple[str, str], cp_model.IntVar] = {}
+    _add_crosslist_constraints(
+        model,
+        input_data.crosslist_groups,
+        options_by_section,
+        option_vars,
+        section_slices,
+    )
+
+    # Break symmetry between interchangeable rooms.
+    _add_room_symmetry_breaking(
+        model, context, options_by_section, option_vars, section_slices
+    )
+
+    # Soft constraint terms for the objective, kept as parallel var and
+    # coefficient lists for a single WeightedSum.
+    objective_vars: List[cp_model.IntVar] = []
+    objective_coeffs: List[int] = []
+    unique_days = context.unique_days
+
+    instructor_day_vars: Dict[str, Dict[str, cp_model.IntVar]] = {}
     adjunct_day_excess_vars: Dict[str, cp_model.IntVar] = {}
     # Track adjunct teaching days for max-teaching-days penalty.
     for instructor in input_data.instructors:
         if instructor.rank_type != "Adjunct" or not instructor.preferences.max_teaching_days:
             continue
         day_vars = []
+        day_var_by_day: Dict[str, cp_model.IntVar] = {}
         for day in unique_days:
             day_var = model.NewBoolVar(f"day_{instructor.id}_{day}")
-            instructor_day_vars[(instructor.id, day)] = day_var
+            day_var_by_day[day] = day_var
             day_vars.append(day_var)
+        instructor_day_vars[instructor.id] = day_var_by_day
         max_days = instructor.preferences.max_teaching_days
         excess = model.NewIntVar(0, len(unique_days), f"excess_{instructor.id}")
-        model.Add(excess >= sum(day_vars) - max_days)
+        model.Add(excess >= cp_model.LinearExpr.Sum(day_vars) - max_days)
         model.Add(excess >= 0)
         adjunct_day_excess_vars[instructor.id] = excess
-        penalty_terms.append(excess * ADJUNCT_DAY_EXCESS_WEIGHT)
+        objective_vars.append(excess)
+        objective_coeffs.append(ADJUNCT_DAY_EXCESS_WEIGHT)
+
+    days_by_timeslot_set: Dict[Tuple[str, ...], FrozenSet[str]] = {}
+    frozen_timeslot_sets = context.frozen_timeslot_sets
+    for options in options_by_section.values():
+        for _, timeslot_set, _, _ in options:
+            if timeslot_set not in days_by_timeslot_set:
+                days_by_timeslot_set[timeslot_set] = frozenset(
+                    timeslot_day[slot_id] for slot_id in timeslot_set
+                )
 
-    # Penalties per assignment: room waste, day preference, pattern preference.
-    for (section_id, idx), var in option_vars.items():
-        pattern_id, timeslot_set, room_id, room_waste = option_data[
-            (section_id, idx)
-        ]
-        section = sections_by_id[section_id]
-        instructor = instructors_by_id.get(section.instructor_id)
-        preferred_days = instructor.preferences.preferred_days if instructor else []
-        preferred_patterns = (
-            instructor.preferences.preferred_patterns if instructor else []
-        )
-        days = {timeslot_day[slot_id] for slot_id in timeslot_set}
-        pref_day_penalty = 0 if days & set(preferred_days) else PREF_DAY_WEIGHT
-        pref_pattern_penalty = (
-            0 if pattern_id in preferred_patterns else PREF_PATTERN_WEIGHT
-        )
-        total_penalty = (
-            room_waste * ROOM_WASTE_WEIGHT + pref_day_penalty + pref_pattern_penalty
+    # Link chosen options to adjunct day usage. Only adjuncts with a
+    # max-teaching-days preference track days.
+    for section_id, options in options_by_section.items():
+        day_var_by_day = instructor_day_vars.get(
+            sections_by_id[section_id].instructor_id
         )
-        penalty_terms.append(var * total_penalty)
-
-        # Link chosen option to adjunct day usage.
-        if instructor and instructor.rank_type == "Adjunct":
-            for day in days:
-                day_var = instructor_day_vars.get((instructor.id, day))
+        if day_var_by_day is None:
+            continue
+        start, end = section_slices[section_id]
+        for var, (_, timeslot_set, _, _) in zip(option_vars[start:end], options):
+            for day in days_by_timeslot_set[timeslot_set]:
+                day_var = day_var_by_day.get(day)
                 if day_var is not None:
-                    model.Add(day_var >= var)
+                    model.AddImplication(var, day_var)
+
+    # Penalties per assignment: room waste, day preference, pattern preference.
+    room_waste_penalties, day_penalties, pattern_penalties = _option_penalty_columns(
+        context, options_by_section
+    )
+    total_penalties = room_waste_penalties + day_penalties + pattern_penalties
+    option_penalties = total_penalties.tolist()
+    for idx in np.flatnonzero(total_penalties).tolist():
+        objective_vars.append(option_vars[idx])
+        objective_coeffs.append(option_penalties[idx])
 
     # Soft lock penalties: penalize options that don't match preferred time/room.
     soft_lock_by_section = {lock.section_id: lock for lock in input_data.soft_locks}
-    for (section_id, idx), var in option_vars.items():
-        soft_lock = soft_lock_by_section.get(section_id)
-        if not soft_lock:
+    for section_id, soft_lock in soft_lock_by_section.items():
+        if section_id not in section_slices:
             continue
-        pattern_id, timeslot_set, room_id, _ = option_data[(section_id, idx)]
-        soft_penalty = 0
-        # Penalize if timeslot doesn't match preference
-        if soft_lock.preferred_timeslot_set:
-            if set(timeslot_set) != set(soft_lock.preferred_timeslot_set):
-                soft_penalty += soft_lock.weight * SOFT_LOCK_BASE_WEIGHT
-        # Penalize if room doesn't match preference
-        if soft_lock.preferred_room:
-            if room_id != soft_lock.preferred_room:
-                soft_penalty += soft_lock.weight * SOFT_LOCK_BASE_WEIGHT
-        if soft_penalty > 0:
-            penalty_terms.append(var * int(soft_penalty))
+        start, end = section_slices[section_id]
+        for option_idx, (_, timeslot_set, room_id, _) in enumerate(
+            options_by_section[section_id], start
+        ):
+            soft_penalty = 0
+            # Penalize if timeslot doesn't match preference
+            if soft_lock.preferred_timeslot_set:
+                if (
+                    frozen_timeslot_sets[timeslot_set]
+                    != soft_lock.preferred_timeslot_set
+                ):
+                    soft_penalty += soft_lock.weight * SOFT_LOCK_BASE_WEIGHT
+            # Penalize if room doesn't match preference
+            if soft_lock.preferred_room:
+                if room_id != soft_lock.preferred_room:
+                    soft_penalty += soft_lock.weight * SOFT_LOCK_BASE_WEIGHT
+            if soft_penalty > 0:
+                objective_vars.append(option_vars[option_idx])
+                objective_coeffs.append(int(soft_penalty))
+                option_penalties[option_idx] += int(soft_penalty)
 
     # Minimize total penalty.
-    model.Minimize(sum(penalty_terms))
+    model.Minimize(cp_model.LinearExpr.WeightedSum(objective_vars, objective_coeffs))
+
+    # Warm-start the search from a greedy assignment, ranking options by their
+    # full objective cost (soft locks included).
+    penalties_by_section = {
+        section_id: option_penalties[start:end]
+        for section_id, (start, end) in section_slices.items()
+    }
+    greedy_choice = _greedy_assignment(
+        context, options_by_section, penalties_by_section
+    )
+    for section_id, chosen_idx in greedy_choice.items():
+        start, end = section_slices[section_id]
+        for idx, var in enumerate(option_vars[start:end]):
+            model.AddHint(var, idx == chosen_idx)
 
     # Solve model.
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 5.0
+    solver = _new_solver(5.0, OPTIMIZE_NUM_WORKERS)
+    # The model is almost purely Boolean, so LP relaxation and probing cost
+    # more presolve/search time than their bounds are worth.
+    solver.parameters.linearization_level = 0
+    solver.parameters.cp_model_probing_level = 0
     status = solver.Solve(model)
     if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        diagnostics = _diagnose_infeasibility(input_data)
+        diagnostics = _diagnose_infeasibility(context, options_by_section)
         print(diagnostics)
         return {
             "status": "error",
@@ -727,39 +1554,33 @@ def _solve_schedule(input_data: SchedulingInput):
         "soft_lock_room": 0.0,
     }
 
+    # Fetch the whole solution vector once instead of one Value() per option.
+    solution_values = np.asarray(solver.ResponseProto().solution, dtype=np.int64)
+    option_values = solution_values[[var.Index() for var in option_vars]]
     for section_id, options in options_by_section.items():
-        chosen_idx = None
-        for idx in range(len(options)):
-            if solver.Value(option_vars[(section_id, idx)]) == 1:
-                chosen_idx = idx
-                break
-        if chosen_idx is None:
+        start, end = section_slices[section_id]
+        chosen = np.flatnonzero(option_values[start:end])
+        if not chosen.size:
             continue
-        pattern_id, timeslot_set, room_id, room_waste = option_data[
-            (section_id, chosen_idx)
-        ]
-        section = sections_by_id[section_id]
-        instructor = instructors_by_id.get(section.instructor_id)
-        preferred_days = instructor.preferences.preferred_days if instructor else []
-        preferred_patterns = (
-            instructor.preferences.preferred_patterns if instructor else []
-        )
-        days = {timeslot_day[slot_id] for slot_id in timeslot_set}
-        pref_day_penalty = 0 if days & set(preferred_days) else PREF_DAY_WEIGHT
-        pref_pattern_penalty = (
-            0 if pattern_id in preferred_patterns else PREF_PATTERN_WEIGHT
+        chosen_idx = int(chosen[0])
+        pattern_id, timeslot_set, room_id, _ = options[chosen_idx]
+        option_idx = start + chosen_idx
+        penalty_breakdown["room_waste"] += float(room_waste_penalties[option_idx])
+        penalty_breakdown["instructor_day_preference"] += float(
+            day_penalties[option_idx]
         )
-        penalty_breakdown["room_waste"] += float(room_waste * ROOM_WASTE_WEIGHT)
-        penalty_breakdown["instructor_day_preference"] += float(pref_day_penalty)
         penalty_breakdown["instructor_pattern_preference"] += float(
-            pref_pattern_penalty
+            pattern_penalties[option_idx]
         )
 
         # Calculate soft lock penalties for this assignment
         soft_lock = soft_lock_by_section.get(section_id)
         if soft_lock:
             if soft_lock.preferred_timeslot_set:
-                if set(timeslot_set) != set(soft_lock.preferred_timeslot_set):
+                if (
+                    frozen_timeslot_sets[timeslot_set]
+                    != soft_lock.preferred_timeslot_set
+                ):
                     penalty_breakdown["soft_lock_time"] += float(
                         soft_lock.weight * SOFT_LOCK_BASE_WEIGHT
                     )
@@ -769,8 +1590,9 @@ def _solve_schedule(input_data: SchedulingInput):
                         soft_lock.weight * SOFT_LOCK_BASE_WEIGHT
                     )
 
+        # Built from already-validated input, so skip field validation.
         assignments.append(
-            ScheduleAssignment(
+            ScheduleAssignment.model_construct(
                 section_id=section_id,
                 meeting_pattern_id=pattern_id,
                 timeslot_ids=list(timeslot_set),
@@ -789,7 +1611,7 @@ def _solve_schedule(input_data: SchedulingInput):
             )
 
     total_score = sum(penalty_breakdown.values())
-    solution = ScheduleSolution(
+    solution = ScheduleSolution.model_construct(
         assignments=assignments,
         total_score=total_score,
         penalty_breakdown=penalty_breakdown,
@@ -805,4 +1627,9 @@ async def read_root():
 
 @app.post("/solve")
 async def solve(request: ScheduleRequest):
-    return _solve_schedule(request.input)
\ No newline at end of file
+    # Encode in pydantic-core rather than jsonable_encoder + json.dumps,
+    # which walk large solutions in Python.
+    return Response(
+        content=to_json(_solve_schedule(request.input)),
+        media_type="application/json",
+    )
\ No newline at end of file